@@ -1,5 +1,5 @@
-import six
 import functools
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras.layers import Layer
 from tensorflow.python.keras import initializers
@@ -19,6 +19,74 @@ from cvnn import logger
 from cvnn.layers.core import DEFAULT_COMPLEX_TYPE
 
 
+@functools.lru_cache(maxsize=256)
+def _cached_normalize_tuple(value, n, name):
+    return conv_utils.normalize_tuple(value, n, name)
+
+
+def _normalize_tuple(value, n, name):
+    """
+    conv_utils.normalize_tuple cached for the (few) different values used when building many layers.
+    """
+    if not isinstance(value, (int, str)):
+        try:    # Make iterables (lists, numpy arrays, ...) hashable for the cache
+            value = tuple(value)
+        except TypeError:
+            pass
+    try:
+        return _cached_normalize_tuple(value, n, name)
+    except TypeError:   # Still not hashable: let conv_utils handle (or reject) it
+        return conv_utils.normalize_tuple(value, n, name)
+
+
+def _cached_get(getter):
+    """
+    Wraps a keras `get` function so that string identifiers are only looked up once in the keras registries.
+    Only for getters returning stateless objects (ex: activation functions) as the same object is returned every time.
+    Any other identifier (None, instances, callables, configs) is not cached and passed directly to the getter.
+    """
+    cached_getter = functools.lru_cache(maxsize=None)(getter)
+
+    def get(identifier):
+        if isinstance(identifier, str):
+            return cached_getter(identifier)
+        return getter(identifier)
+    return get
+
+
+_get_activation = _cached_get(activations.get)
+# Not cached: these getters build a new (possibly stateful, ex: seeded) object that must not be shared between layers
+_get_initializer = initializers.get
+_get_regularizer = regularizers.get
+_get_constraint = constraints.get
+
+
+def _im2col_convolution(inputs, kernel, **kwargs):
+    """
+    2D convolution (channels_last) done as image patches extraction (im2col) followed by a single matrix multiplication.
+    The patches are flattened in (rows, cols, channels) order, the same as the reshaped kernel.
+    """
+    patches = tf.image.extract_patches(inputs, **kwargs)
+    return tf.tensordot(patches, tf.reshape(kernel, (-1, kernel.shape[-1])), axes=1)
+
+
+def _depthwise_convolution(inputs, kernel, depthwise_kernel_shape, **kwargs):
+    """
+    Grouped convolution with groups == input channels using tf.nn.depthwise_conv2d (channels_last).
+    The grouped kernel (kh, kw, 1, in_channels * multiplier) is seen as a depthwise kernel
+    (kh, kw, in_channels, multiplier) as both produce the output channels in the same order.
+    """
+    return tf.nn.depthwise_conv2d(inputs, tf.reshape(kernel, depthwise_kernel_shape), data_format='NHWC', **kwargs)
+
+
+def _pointwise_convolution(inputs, kernel):
+    """
+    Convolution with a kernel of spatial size 1 (with strides and dilation 1) done as a matrix multiplication.
+    Padding has no effect in this case.
+    """
+    return tf.tensordot(inputs, tf.reshape(kernel, kernel.shape[-2:]), axes=1)
+
+
 class ComplexConv(Layer, ComplexLayer):
     """
     Almost exact copy of
@@ -31,6 +99,9 @@ class ComplexConv(Layer, ComplexLayer):
       `activation` is not `None`, it is applied to the outputs as well.
       Note: layer attributes cannot be modified after the layer has been called
       once (except the `trainable` attribute).
+      Note: complex weights are stored as `kernel_ri` and `bias_ri` (real and imaginary parts stacked on the first
+      axis). Checkpoints and h5 files saved with the former `kernel_r`, `kernel_i`, `bias_r`, `bias_i` variables
+      can no longer be loaded with `load_weights`. The layer `set_weights` still accepts that former layout.
       Arguments:
         rank: An integer, the rank of the convolution, e.g. "2" for 2D convolution.
         filters: Integer, the dimensionality of the output space (i.e. the number
@@ -79,6 +150,14 @@ class ComplexConv(Layer, ComplexLayer):
             not safe to use when doing asynchronous distributed training.
         bias_constraint: Optional projection function to be applied to the
             bias after being updated by an `Optimizer`.
+        compute_dtype: Real dtype used for the convolutions (ex: `tf.bfloat16`).
+            Kernel and bias are kept in `dtype` and the output is cast back to it.
+            Default None will do the convolutions on `dtype` directly.
+        use_xla: If True, the convolutions and the real/imaginary combination are compiled together with XLA.
+            It is not always faster, so it is disabled by default.
+        use_im2col_cpu: If True and no GPU is available, 2D convolutions are done by extracting the image patches
+            followed by a single matrix multiplication, which is often faster on CPU for small inputs.
+            Ignored if `use_xla` is True.
       """
 
     def __init__(self, rank, filters, kernel_size, dtype, strides=1, padding='valid', data_format=None, dilation_rate=1,
@@ -86,38 +165,40 @@ class ComplexConv(Layer, ComplexLayer):
                  kernel_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
                  kernel_regularizer=None, bias_regularizer=None,  # TODO: Not yet working
                  activity_regularizer=None, kernel_constraint=None, bias_constraint=None,
-                 trainable=True, name=None, conv_op=None, **kwargs):
+                 trainable=True, name=None, conv_op=None, compute_dtype=None, use_xla=False,
+                 use_im2col_cpu=False, **kwargs):
         if kernel_regularizer is not None or bias_regularizer is not None:
             logger.warning(f"Sorry, regularizers are not implemented yet, this parameter will take no effect")
         super(ComplexConv, self).__init__(
             trainable=trainable,
             name=name,
-            activity_regularizer=regularizers.get(activity_regularizer),
+            activity_regularizer=_get_regularizer(activity_regularizer),
             **kwargs)
         self.rank = rank
         self.my_dtype = tf.dtypes.as_dtype(dtype)
+        self._set_compute_dtype(compute_dtype)
+        self.use_xla = use_xla
+        self.use_im2col_cpu = use_im2col_cpu
         # I use no default dtype to make sure I don't forget to give it to my ComplexConv layers
         if isinstance(filters, float):
             filters = int(filters)
         self.filters = filters
         self.groups = groups or 1
-        self.kernel_size = conv_utils.normalize_tuple(
-            kernel_size, rank, 'kernel_size')
-        self.strides = conv_utils.normalize_tuple(strides, rank, 'strides')
+        self.kernel_size = _normalize_tuple(kernel_size, rank, 'kernel_size')
+        self.strides = _normalize_tuple(strides, rank, 'strides')
         self.padding = conv_utils.normalize_padding(padding)
         self.data_format = conv_utils.normalize_data_format(data_format)
-        self.dilation_rate = conv_utils.normalize_tuple(
-            dilation_rate, rank, 'dilation_rate')
+        self.dilation_rate = _normalize_tuple(dilation_rate, rank, 'dilation_rate')
 
-        self.activation = activations.get(activation)
+        self.activation = _get_activation(activation)
         self.use_bias = use_bias
 
-        self.kernel_initializer = initializers.get(kernel_initializer)
-        self.bias_initializer = initializers.get(bias_initializer)
-        self.kernel_regularizer = regularizers.get(kernel_regularizer)
-        self.bias_regularizer = regularizers.get(bias_regularizer)
-        self.kernel_constraint = constraints.get(kernel_constraint)
-        self.bias_constraint = constraints.get(bias_constraint)
+        self.kernel_initializer = _get_initializer(kernel_initializer)
+        self.bias_initializer = _get_initializer(bias_initializer)
+        self.kernel_regularizer = _get_regularizer(kernel_regularizer)
+        self.bias_regularizer = _get_regularizer(bias_regularizer)
+        self.kernel_constraint = _get_constraint(kernel_constraint)
+        self.bias_constraint = _get_constraint(bias_constraint)
         self.input_spec = InputSpec(min_ndim=self.rank + 2)
 
         self._validate_init()
@@ -125,6 +206,10 @@ class ComplexConv(Layer, ComplexLayer):
         self._channels_first = self.data_format == 'channels_first'
         self._tf_data_format = conv_utils.convert_data_format(
             self.data_format, self.rank + 2)
+        # Pure functions of data_format, rank and padding: computed once
+        self._channel_axis = self._get_channel_axis()
+        self._padding_op = self._get_padding_op()   # Causal padding handled in `call`.
+        self._warned_input_dtype = False
 
     def _validate_init(self):
         if self.filters is not None and self.filters % self.groups != 0:
@@ -151,30 +236,22 @@ class ComplexConv(Layer, ComplexLayer):
                 f'(full input shape is {input_shape}).')
         kernel_shape = self.kernel_size + (input_channel // self.groups, self.filters)
         if self.my_dtype.is_complex:
-            self.kernel_r = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=self.my_dtype),
-                name='kernel_r',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer,
-            self.kernel_i = tf.Variable(
-                initial_value=self.kernel_initializer(shape=kernel_shape, dtype=self.my_dtype),
-                name='kernel_i',
-                constraint=self.kernel_constraint,
-                trainable=True
-            )  # TODO: regularizer=self.kernel_regularizer
+            # Real and imaginary parts are stacked on the first axis of a single variable (see kernel_r and kernel_i)
+            self.kernel_ri = self.add_weight(
+                name='kernel_ri',
+                shape=(2,) + kernel_shape,
+                initializer=self._get_stacked_initializer(self.kernel_initializer),
+                constraint=self._get_stacked_constraint(self.kernel_constraint),
+                trainable=True,
+                dtype=self.my_dtype.real_dtype)  # TODO: regularizer=self.kernel_regularizer
             if self.use_bias:
-                self.bias_r = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=self.my_dtype),
-                    name='bias_r',
-                    trainable=True
-                )
-                self.bias_i = tf.Variable(
-                    initial_value=self.bias_initializer(shape=(self.filters,), dtype=self.my_dtype),
-                    name='bias_i',
-                    constraint=self.bias_constraint,
-                    trainable=True
-                )  # TODO: regularizer=self.bias_regularizer
+                self.bias_ri = self.add_weight(
+                    name='bias_ri',
+                    shape=(2, self.filters),
+                    initializer=self._get_stacked_initializer(self.bias_initializer),
+                    constraint=self._get_stacked_constraint(self.bias_constraint),
+                    trainable=True,
+                    dtype=self.my_dtype.real_dtype)  # TODO: regularizer=self.bias_regularizer
         else:
             self.kernel = self.add_weight(
                 name='kernel',
@@ -195,17 +272,15 @@ class ComplexConv(Layer, ComplexLayer):
                     dtype=self.my_dtype)
         if not self.use_bias:
             self.bias = None
-        channel_axis = self._get_channel_axis()
         self.input_spec = InputSpec(min_ndim=self.rank + 2,
-                                    axes={channel_axis: input_channel})
+                                    axes={self._channel_axis: input_channel})
+        # Computed once here when the input rank is known instead of at every call
+        self._causal_padding = None
+        if self._is_causal and input_shape.rank is not None:
+            self._causal_padding = self._compute_causal_padding(input_shape)
 
         # Convert Keras formats to TF native formats.
-        if self.padding == 'causal':
-            tf_padding = 'VALID'  # Causal padding handled in `call`.
-        elif isinstance(self.padding, six.string_types):
-            tf_padding = self.padding.upper()
-        else:
-            tf_padding = self.padding
+        tf_padding = self._padding_op
         tf_dilations = list(self.dilation_rate)
         tf_strides = list(self.strides)
 
@@ -213,15 +288,88 @@ class ComplexConv(Layer, ComplexLayer):
         if tf_op_name == 'Conv1D':
             tf_op_name = 'conv1d'  # Backwards compat.
 
-        self._convolution_op = functools.partial(
-            nn_ops.convolution_v2,
-            strides=tf_strides,
-            padding=tf_padding,
-            dilations=tf_dilations,
-            data_format=self._tf_data_format,
-            name=tf_op_name)
+        # channels_first inputs are transposed in `call` so convolutions always use the channels_last (NHWC) kernels
+        # The dedicated 2D ops below expect a single batch dimension (with more, they give wrong outputs or raise)
+        single_batch_dim = input_shape.rank == self.rank + 2
+        if self.groups == 1 and all(k == 1 for k in self.kernel_size + self.strides + self.dilation_rate):
+            # 1x1 convolution (no stride nor dilation): a single matrix multiplication over the channels
+            self._convolution_op = _pointwise_convolution
+        elif self.rank == 2 and single_batch_dim and self.groups > 1 and self.groups == input_channel and \
+                (all(s == 1 for s in self.strides) or all(d == 1 for d in self.dilation_rate)):
+            # Depthwise convolution: its dedicated kernel is much faster than the generic grouped convolution.
+            # Strides and dilation together are left to the generic convolution (which rejects them):
+            # tf.nn.depthwise_conv2d does not raise and returns a wrong output in that case.
+            self._convolution_op = functools.partial(
+                _depthwise_convolution,
+                depthwise_kernel_shape=self.kernel_size + (input_channel, self.filters // input_channel),
+                strides=[1] + tf_strides + [1],
+                padding=tf_padding,
+                dilations=tf_dilations,
+                name=tf_op_name)
+        elif self.rank == 2 and single_batch_dim and self.groups == 1 and self.use_im2col_cpu and not self.use_xla and \
+                not tf.config.list_logical_devices('GPU'):
+            # Not with XLA: the gradient of the image patches extraction cannot be compiled
+            self._convolution_op = functools.partial(
+                _im2col_convolution,
+                sizes=[1] + list(self.kernel_size) + [1],
+                strides=[1] + tf_strides + [1],
+                rates=[1] + tf_dilations + [1],
+                padding=tf_padding)
+        else:
+            self._convolution_op = functools.partial(
+                nn_ops.convolution_v2,
+                strides=tf_strides,
+                padding=tf_padding,
+                dilations=tf_dilations,
+                data_format=conv_utils.convert_data_format('channels_last', self.rank + 2),
+                name=tf_op_name)
+        # Real layers have no imaginary part to compute: a single real convolution is enough
+        conv_body = self._complex_conv_body if self.my_dtype.is_complex else self._convolution_op
+        if self.use_xla:
+            self._conv_body = tf.function(conv_body, jit_compile=True)
+        else:
+            self._conv_body = conv_body
         self.built = True
 
+    def _get_stacked_initializer(self, initializer):
+        # Each part is drawn with the shape of a single part so the initializer computes the right fans
+        def stacked_initializer(shape, dtype=None):
+            return tf.stack([initializer(shape=shape[1:], dtype=self.my_dtype),
+                             initializer(shape=shape[1:], dtype=self.my_dtype)])
+        return stacked_initializer
+
+    @staticmethod
+    def _get_stacked_constraint(constraint):
+        # Applied to each part on its own so axis based constraints (e.g. MaxNorm) keep the axes of the part shape
+        if constraint is None:
+            return None
+
+        def stacked_constraint(w):
+            return tf.stack([constraint(w[0]), constraint(w[1])])
+        return stacked_constraint
+
+    def set_weights(self, weights):
+        # Also accepts the former layout [kernel_r, kernel_i, bias_r, bias_i] (or [kernel_r, kernel_i] without bias)
+        if self.my_dtype.is_complex and len(weights) == 2 * len(self.weights):
+            weights = [np.stack(weights[i:i + 2]) for i in range(0, len(weights), 2)]
+        super(ComplexConv, self).set_weights(weights)
+
+    @property
+    def kernel_r(self):
+        return self.kernel_ri[0]
+
+    @property
+    def kernel_i(self):
+        return self.kernel_ri[1]
+
+    @property
+    def bias_r(self):
+        return self.bias_ri[0]
+
+    @property
+    def bias_i(self):
+        return self.bias_ri[1]
+
     def call(self, inputs):
         """
         Calls convolution, this function is divided in 4:
@@ -232,54 +380,68 @@ class ComplexConv(Layer, ComplexLayer):
         :returns: A tensor of rank 4+ representing `activation(conv2d(inputs, kernel) + bias)`.
         """
         if inputs.dtype != self.my_dtype:
-            tf.print(f"WARNING: {self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
-            if self.my_dtype.is_complex and inputs.dtype.is_floating:
-                tf.print("\tThis is normally fixed using ComplexInput() "
-                         "at the start (tf casts input automatically to real).")
+            # Python-side check on the static dtype: logged once instead of adding a print op to the graph
+            if not self._warned_input_dtype:
+                self._warned_input_dtype = True
+                logger.warning(f"{self.name} - Expected input to be {self.my_dtype}, but received {inputs.dtype}.")
+                if self.my_dtype.is_complex and inputs.dtype.is_floating:
+                    logger.warning("This is normally fixed using ComplexInput() "
+                                   "at the start (tf casts input automatically to real).")
             inputs = tf.cast(inputs, self.my_dtype)
         if self._is_causal:  # Apply causal padding to inputs for Conv1D.
-            inputs = array_ops.pad(inputs, self._compute_causal_padding(inputs))
+            causal_padding = self._causal_padding
+            if causal_padding is None:      # Input rank was unknown at build time
+                causal_padding = self._compute_causal_padding(inputs.shape)
+            inputs = array_ops.pad(inputs, causal_padding)
+        if self._channels_first:
+            inputs = tf.transpose(inputs, self._channels_last_perm(inputs.shape.rank))
         # Convolution
-        inputs_r = tf.math.real(inputs)
-        inputs_i = tf.math.imag(inputs)
         if self.my_dtype.is_complex:
-            kernel_r = self.kernel_r
-            kernel_i = self.kernel_i
+            inputs_r, inputs_i, kernel_r, kernel_i = self._cast_to_compute_dtype(tf.math.real(inputs),
+                                                                                 tf.math.imag(inputs),
+                                                                                 self.kernel_r, self.kernel_i)
+            real_outputs, imag_outputs = self._conv_body(inputs_r, inputs_i, kernel_r, kernel_i)
+            real_outputs = self._cast_from_compute_dtype(real_outputs)
+            imag_outputs = self._cast_from_compute_dtype(imag_outputs)
+            # Add bias on each real part (channels are last here, so this also handles multiple batch dimensions)
             if self.use_bias:
-                bias = tf.complex(self.bias_r, self.bias_i)
+                real_outputs = nn.bias_add(real_outputs, self.bias_r)
+                imag_outputs = nn.bias_add(imag_outputs, self.bias_i)
+            # Both parts are already in my_dtype.real_dtype, no cast needed
+            outputs = tf.complex(real_outputs, imag_outputs)
         else:
-            kernel_r = tf.math.real(self.kernel)
-            kernel_i = tf.math.imag(self.kernel)
+            inputs, kernel = self._cast_to_compute_dtype(inputs, self.kernel)
+            outputs = self._cast_from_compute_dtype(self._conv_body(inputs, kernel))
             if self.use_bias:
-                bias = self.bias
-        real_outputs = self._convolution_op(inputs_r, kernel_r) - self._convolution_op(inputs_i, kernel_i)
-        imag_outputs = self._convolution_op(inputs_r, kernel_i) + self._convolution_op(inputs_i, kernel_r)
-        outputs = tf.cast(tf.complex(real_outputs, imag_outputs), dtype=self.my_dtype)
-        # Add bias
-        if self.use_bias:
-            output_rank = outputs.shape.rank
-            if self.rank == 1 and self._channels_first:
-                # nn.bias_add does not accept a 1D input tensor.
-                bias = array_ops.reshape(bias, (1, self.filters, 1))
-                outputs += bias
-            else:
-                # Handle multiple batch dimensions.
-                if output_rank is not None and output_rank > 2 + self.rank:
-
-                    def _apply_fn(o):
-                        # TODO: Will this bias be visible? Horrible
-                        return nn.bias_add(o, bias, data_format=self._tf_data_format)
-
-                    outputs = nn_ops.squeeze_batch_dims(
-                        outputs, _apply_fn, inner_rank=self.rank + 1)
-                else:
-                    outputs = nn.bias_add(
-                        outputs, bias, data_format=self._tf_data_format)
+                outputs = nn.bias_add(outputs, self.bias)
+        if self._channels_first:
+            outputs = tf.transpose(outputs, self._channels_first_perm(outputs.shape.rank))
         # Activation function
         if self.activation is not None:
             outputs = self.activation(outputs)
         return outputs
 
+    def _complex_conv_body(self, inputs_r, inputs_i, kernel_r, kernel_i):
+        """
+        Complex convolution using only real-valued convolutions (channels_last).
+        :returns: Tuple (real_outputs, imag_outputs)
+        """
+        if self.groups == 1:
+            # Real-valued equivalent: [inputs_r, inputs_i] stacked on the channels convolved with the block kernel
+            #   [[kernel_r, kernel_i],
+            #    [-kernel_i, kernel_r]]     (input channels x filters)
+            # gives [real_outputs, imag_outputs] on the output channels with a single convolution
+            block_kernel = tf.concat([tf.concat([kernel_r, kernel_i], axis=-1),
+                                      tf.concat([-kernel_i, kernel_r], axis=-1)], axis=-2)
+            outputs = self._convolution_op(tf.concat([inputs_r, inputs_i], axis=-1), block_kernel)
+            return tf.split(outputs, 2, axis=-1)
+        else:
+            # Packing the filters would mix the groups. Gauss's trick: 3 real convolutions instead of 4
+            k1 = self._convolution_op(inputs_r + inputs_i, kernel_r)
+            k2 = self._convolution_op(inputs_i, kernel_r + kernel_i)
+            k3 = self._convolution_op(inputs_r, kernel_i - kernel_r)
+            return k1 - k2, k1 + k3
+
     def _spatial_output_shape(self, spatial_input_shape):
         return [
             conv_utils.conv_output_length(
@@ -340,18 +502,26 @@ class ComplexConv(Layer, ComplexLayer):
             'kernel_constraint':
                 constraints.serialize(self.kernel_constraint),
             'bias_constraint':
-                constraints.serialize(self.bias_constraint)
+                constraints.serialize(self.bias_constraint),
+            'dtype':    # The keras dtype is float32 as `dtype` is not given to Layer
+                self.my_dtype.name,
+            'compute_dtype':
+                None if self.my_compute_dtype is None else self.my_compute_dtype.name,
+            'use_xla':
+                self.use_xla,
+            'use_im2col_cpu':
+                self.use_im2col_cpu
         }
         base_config = super(ComplexConv, self).get_config()
-        return dict(list(base_config.items()) + list(config.items()))
+        return {**base_config, **config}
 
-    def _compute_causal_padding(self, inputs):
+    def _compute_causal_padding(self, input_shape):
         """Calculates padding for 'causal' option for 1-d conv layers."""
         left_pad = self.dilation_rate[0] * (self.kernel_size[0] - 1)
-        if getattr(inputs.shape, 'ndims', None) is None:
+        if getattr(input_shape, 'ndims', None) is None:
             batch_rank = 1
         else:
-            batch_rank = len(inputs.shape) - 2
+            batch_rank = len(input_shape) - 2
         if self.data_format == 'channels_last':
             causal_padding = [[0, 0]] * batch_rank + [[left_pad, 0], [0, 0]]
         else:
@@ -364,12 +534,19 @@ class ComplexConv(Layer, ComplexLayer):
         else:
             return -1
 
+    def _channels_last_perm(self, tensor_rank):
+        batch_rank = tensor_rank - self.rank - 1
+        return list(range(batch_rank)) + list(range(batch_rank + 1, tensor_rank)) + [batch_rank]
+
+    def _channels_first_perm(self, tensor_rank):
+        batch_rank = tensor_rank - self.rank - 1
+        return list(range(batch_rank)) + [tensor_rank - 1] + list(range(batch_rank, tensor_rank - 1))
+
     def _get_input_channel(self, input_shape):
-        channel_axis = self._get_channel_axis()
-        if input_shape.dims[channel_axis].value is None:
+        if input_shape.dims[self._channel_axis].value is None:
             raise ValueError('The channel dimension of the inputs '
                              'should be defined. Found `None`.')
-        return int(input_shape[channel_axis])
+        return int(input_shape[self._channel_axis])
 
     def _get_padding_op(self):
         if self.padding == 'causal':
@@ -390,7 +567,8 @@ class ComplexConv(Layer, ComplexLayer):
                            kernel_regularizer=self.kernel_regularizer, bias_regularizer=self.bias_regularizer,
                            activity_regularizer=self.activity_regularizer, kernel_constraint=self.kernel_constraint,
                            bias_constraint=self.bias_constraint, trainable=self.trainable,
-                           name=self.name + "_real_equiv")
+                           compute_dtype=self.my_compute_dtype, use_xla=self.use_xla,
+                           use_im2col_cpu=self.use_im2col_cpu, name=self.name + "_real_equiv")
 
 
 class ComplexConv1D(ComplexConv):
@@ -421,15 +599,15 @@ class ComplexConv1D(ComplexConv):
             data_format=data_format,
             dilation_rate=dilation_rate,
             groups=groups,
-            activation=activations.get(activation),
+            activation=_get_activation(activation),
             use_bias=use_bias,
-            kernel_initializer=initializers.get(kernel_initializer),
-            bias_initializer=initializers.get(bias_initializer),
-            kernel_regularizer=regularizers.get(kernel_regularizer),
-            bias_regularizer=regularizers.get(bias_regularizer),
-            activity_regularizer=regularizers.get(activity_regularizer),
-            kernel_constraint=constraints.get(kernel_constraint),
-            bias_constraint=constraints.get(bias_constraint),
+            kernel_initializer=_get_initializer(kernel_initializer),
+            bias_initializer=_get_initializer(bias_initializer),
+            kernel_regularizer=_get_regularizer(kernel_regularizer),
+            bias_regularizer=_get_regularizer(bias_regularizer),
+            activity_regularizer=_get_regularizer(activity_regularizer),
+            kernel_constraint=_get_constraint(kernel_constraint),
+            bias_constraint=_get_constraint(bias_constraint),
             **kwargs)
 
 
@@ -464,7 +642,8 @@ class ComplexConv2D(ComplexConv):
                  groups=1, activation=None, use_bias=True, dtype=DEFAULT_COMPLEX_TYPE,
                  kernel_initializer=ComplexGlorotUniform(), bias_initializer=Zeros(),
                  kernel_regularizer=None, bias_regularizer=None, activity_regularizer=None,
-                 kernel_constraint=None, bias_constraint=None, **kwargs):
+                 kernel_constraint=None, bias_constraint=None, compute_dtype=None, use_xla=False,
+                 use_im2col_cpu=False, **kwargs):
         """
         :param filters: Integer, the dimensionality of the output space (i.e. the number of output filters in the convolution).
         :param kernel_size: An integer or tuple/list of 2 integers, specifying the height
@@ -505,6 +684,14 @@ class ComplexConv2D(ComplexConv):
         :param activity_regularizer: Regularizer function applied to the output of the layer (its "activation") (see `keras.regularizers`).
         :param kernel_constraint: Constraint function applied to the kernel matrix (see `keras.constraints`).
         :param bias_constraint: Constraint function applied to the bias vector (see `keras.constraints`).
+        :param compute_dtype: Real dtype used for the convolutions (ex: `tf.bfloat16`).
+            Kernel and bias are kept in `dtype` and the output is cast back to it.
+            Default None will do the convolutions on `dtype` directly.
+        :param use_xla: If True, the convolutions and the real/imaginary combination are compiled together with XLA.
+            It is not always faster, so it is disabled by default.
+        :param use_im2col_cpu: If True and no GPU is available, the convolution is done by extracting the image patches
+            followed by a single matrix multiplication, which is often faster on CPU for small inputs.
+            Ignored if `use_xla` is True.
         """
         super(ComplexConv2D, self).__init__(
             rank=2, dtype=dtype,
@@ -515,15 +702,18 @@ class ComplexConv2D(ComplexConv):
             data_format=data_format,
             dilation_rate=dilation_rate,
             groups=groups,
-            activation=activations.get(activation),
+            activation=_get_activation(activation),
             use_bias=use_bias,
-            kernel_initializer=initializers.get(kernel_initializer),
-            bias_initializer=initializers.get(bias_initializer),
-            kernel_regularizer=regularizers.get(kernel_regularizer),
-            bias_regularizer=regularizers.get(bias_regularizer),
-            activity_regularizer=regularizers.get(activity_regularizer),
-            kernel_constraint=constraints.get(kernel_constraint),
-            bias_constraint=constraints.get(bias_constraint),
+            kernel_initializer=_get_initializer(kernel_initializer),
+            bias_initializer=_get_initializer(bias_initializer),
+            kernel_regularizer=_get_regularizer(kernel_regularizer),
+            bias_regularizer=_get_regularizer(bias_regularizer),
+            activity_regularizer=_get_regularizer(activity_regularizer),
+            kernel_constraint=_get_constraint(kernel_constraint),
+            bias_constraint=_get_constraint(bias_constraint),
+            compute_dtype=compute_dtype,
+            use_xla=use_xla,
+            use_im2col_cpu=use_im2col_cpu,
             **kwargs)
 
 
@@ -641,13 +831,13 @@ class ComplexConv3D(ComplexConv):
             data_format=data_format,
             dilation_rate=dilation_rate,
             groups=groups,
-            activation=activations.get(activation),
+            activation=_get_activation(activation),
             use_bias=use_bias,
-            kernel_initializer=initializers.get(kernel_initializer),
-            bias_initializer=initializers.get(bias_initializer),
-            kernel_regularizer=regularizers.get(kernel_regularizer),
-            bias_regularizer=regularizers.get(bias_regularizer),
-            activity_regularizer=regularizers.get(activity_regularizer),
-            kernel_constraint=constraints.get(kernel_constraint),
-            bias_constraint=constraints.get(bias_constraint),
+            kernel_initializer=_get_initializer(kernel_initializer),
+            bias_initializer=_get_initializer(bias_initializer),
+            kernel_regularizer=_get_regularizer(kernel_regularizer),
+            bias_regularizer=_get_regularizer(bias_regularizer),
+            activity_regularizer=_get_regularizer(activity_regularizer),
+            kernel_constraint=_get_constraint(kernel_constraint),
+            bias_constraint=_get_constraint(bias_constraint),
             **kwargs)
\ No newline at end of file
@@ -25,6 +25,20 @@ class ComplexLayer(ABC):
         """
         pass
 
+    def _set_compute_dtype(self, compute_dtype):
+        # Real dtype of the heavy operations (ex: tf.bfloat16), None to compute on `my_dtype` directly
+        self.my_compute_dtype = None if compute_dtype is None else tf.dtypes.as_dtype(compute_dtype)
+
+    def _cast_to_compute_dtype(self, *tensors):
+        if self.my_compute_dtype is None:
+            return tensors
+        return [tf.cast(t, self.my_compute_dtype) for t in tensors]
+
+    def _cast_from_compute_dtype(self, tensor):
+        if self.my_compute_dtype is None:
+            return tensor
+        return tf.cast(tensor, self.my_dtype.real_dtype)
+
 
 def complex_input(shape=None, batch_size=None, name=None, dtype=DEFAULT_COMPLEX_TYPE,
                   sparse=False, tensor=None, ragged=False, **kwargs):
@@ -167,6 +181,7 @@ class ComplexDense(Dense, ComplexLayer):
                  kernel_initializer=ComplexGlorotUniform(),
                  bias_initializer=Zeros(),
                  dtype=DEFAULT_COMPLEX_TYPE,  # TODO: Check typing of this.
+                 compute_dtype=None,
                  **kwargs):
         """
         :param units: Positive integer, dimensionality of the output space.
@@ -179,6 +194,9 @@ class ComplexDense(Dense, ComplexLayer):
         :param bias_initializer: Initializer for the bias vector.
             Recomended to use a `ComplexInitializer` such as `cvnn.initializers.Zeros()` (default)
         :param dtype: Dtype of the input and layer.
+        :param compute_dtype: Real dtype used for the matrix multiplications (ex: `tf.bfloat16`).
+            Weights and bias are kept in `dtype` and the output is cast back to it.
+            Default None will do the multiplications on `dtype` directly.
         """
         # TODO: verify the initializers? and that dtype complex has cvnn.activations.
         super(ComplexDense, self).__init__(units, activation=activation, use_bias=use_bias,
@@ -186,6 +204,7 @@ class ComplexDense(Dense, ComplexLayer):
                                            bias_initializer=bias_initializer, **kwargs)
         # !Cannot override dtype of the layer because it has a read-only @property
         self.my_dtype = tf.dtypes.as_dtype(dtype)
+        self._set_compute_dtype(compute_dtype)
 
     def build(self, input_shape):
         if self.my_dtype.is_complex:
@@ -225,12 +244,15 @@ class ComplexDense(Dense, ComplexLayer):
                          "at the start (tf casts input automatically to real).")
             inputs = tf.cast(inputs, self.my_dtype)
         if self.my_dtype.is_complex:
-            w = tf.complex(self.w_r, self.w_i)
-            b = tf.complex(self.b_r, self.b_i)
+            # (a + ib)(c + id) = (ac - bd) + i(ad + bc): real matmuls avoid the slower complex kernels
+            inputs_r, inputs_i, w_r, w_i = self._cast_to_compute_dtype(tf.math.real(inputs), tf.math.imag(inputs),
+                                                                       self.w_r, self.w_i)
+            real_out = self._cast_from_compute_dtype(tf.matmul(inputs_r, w_r) - tf.matmul(inputs_i, w_i))
+            imag_out = self._cast_from_compute_dtype(tf.matmul(inputs_r, w_i) + tf.matmul(inputs_i, w_r))
+            out = tf.complex(real_out + self.b_r, imag_out + self.b_i)
         else:
-            w = self.w
-            b = self.b
-        out = tf.matmul(inputs, w) + b
+            inputs, w = self._cast_to_compute_dtype(inputs, self.w)
+            out = self._cast_from_compute_dtype(tf.matmul(inputs, w)) + self.b
         return self.activation(out)
 
     def get_real_equivalent(self, output_multiplier=2):
@@ -239,7 +261,16 @@ class ComplexDense(Dense, ComplexLayer):
         return ComplexDense(units=int(round(self.units * output_multiplier)),
                             activation=self.activation, use_bias=self.use_bias,
                             kernel_initializer=self.kernel_initializer, bias_initializer=self.bias_initializer,
-                            dtype=self.my_dtype.real_dtype, name=self.name + "_real_equiv")
+                            dtype=self.my_dtype.real_dtype, compute_dtype=self.my_compute_dtype,
+                            name=self.name + "_real_equiv")
+
+    def get_config(self):
+        config = {
+            'dtype': self.my_dtype.name,    # The keras dtype is float32 as `dtype` is not given to Dense
+            'compute_dtype': None if self.my_compute_dtype is None else self.my_compute_dtype.name
+        }
+        base_config = super(ComplexDense, self).get_config()
+        return {**base_config, **config}
 
 
 class ComplexDropout(Layer, ComplexLayer):
@@ -305,4 +336,4 @@ class ComplexDropout(Layer, ComplexLayer):
             'seed': self.seed
         }
         base_config = super(ComplexDropout, self).get_config()
-        return dict(list(base_config.items()) + list(config.items()))
\ No newline at end of file
+        return {**base_config, **config}
\ No newline at end of file
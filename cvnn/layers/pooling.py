@@ -92,7 +92,7 @@ class ComplexPooling2D(Layer, ComplexLayer):
             'data_format': self.data_format
         }
         base_config = super(ComplexPooling2D, self).get_config()
-        return dict(list(base_config.items()) + list(config.items()))
+        return {**base_config, **config}
 
 
 class ComplexMaxPooling2D(ComplexPooling2D):
@@ -1,5 +1,6 @@
 import logging
 import os
+import argparse
 import json
 import tensorflow as tf
 import pandas as pd
@@ -7,6 +8,7 @@ import numpy as np
 from tqdm import tqdm
 from pdb import set_trace
 from time import sleep
+from functools import lru_cache
 from openpyxl import load_workbook, Workbook
 from openpyxl.worksheet.table import Table
 from tensorflow.keras.losses import categorical_crossentropy
@@ -15,7 +17,7 @@ from tensorflow.keras import Model
 import cvnn
 import cvnn.layers as layers
 import cvnn.dataset as dp
-from cvnn.data_analysis import MonteCarloAnalyzer, Plotter, get_confusion_matrix
+from cvnn.data_analysis import MonteCarloAnalyzer, get_confusion_matrix
 from cvnn.layers import ComplexDense, ComplexDropout
 from cvnn.utils import transform_to_real, randomize
 from cvnn.real_equiv_tools import get_real_equivalent
@@ -40,6 +42,7 @@ class MonteCarlo:
         """
         self.models = []
         self.pandas_full_data = pd.DataFrame()
+        self._frames = []           # One data frame per iteration and model, concatenated at the end of the run
         self.monte_carlo_analyzer = MonteCarloAnalyzer()  # All at None
         self.output_config = {
             'plot_all': False,
@@ -117,25 +120,68 @@ class MonteCarlo:
         w_save = []                     # TODO: Find a better method
         for model in self.models:       # ATTENTION: This will make all models have the SAME weights, not ideal
             w_save.append(model.get_weights())     # Save model weight
+        x_real, val_data_real, test_data_real = None, None, None
+        if not all(model.inputs[0].dtype.is_complex for model in self.models):
+            # Compute the real valued data only once, x_real is then shuffled together with x
+            x_real, val_data_real, test_data_real = self._get_fit_dataset(False, x, validation_data, test_data, polar)
+        if shuffle:
+            # All permutations are drawn beforehand. At each iteration the data is gathered into the same buffers
+            #   instead of allocating new shuffled copies of the whole dataset.
+            permutations = np.empty((iterations, y.shape[0]), dtype=np.int32)
+            for permutation in permutations:
+                permutation[:] = np.random.permutation(y.shape[0])
+            to_shuffle = [(array, np.empty_like(array)) for array in (x, y, x_real) if array is not None]
+            x, y = to_shuffle[0][1], to_shuffle[1][1]
+            if x_real is not None:
+                x_real = to_shuffle[2][1]
 
         for it in range(iterations):
             if debug:
                 logger.info("Iteration {}/{}".format(it + 1, iterations))
             if shuffle:  # shuffle all data at each iteration
-                x, y = randomize(x, y)
+                for array, shuffled_array in to_shuffle:
+                    np.take(array, permutations[it], axis=0, out=shuffled_array)
+            if it == 0 or shuffle:      # Input pipelines are only rebuilt if the data changed
+                train_data = {True: self._get_train_dataset(x, y, validation_data, validation_split, batch_size)}
+                if x_real is not None:
+                    train_data[False] = self._get_train_dataset(x_real, y, val_data_real, validation_split,
+                                                                batch_size)
             for i, model in enumerate(self.models):
-                x_fit, val_data_fit, test_data_fit = self._get_fit_dataset(model.inputs[0].dtype.is_complex, x,
-                                                                           validation_data, test_data, polar)
+                if model.inputs[0].dtype.is_complex:
+                    val_data_fit, test_data_fit = validation_data, test_data
+                else:
+                    val_data_fit, test_data_fit = val_data_real, test_data_real
+                train_dataset, fit_validation_data = train_data[model.inputs[0].dtype.is_complex]
                 model.set_weights(w_save[i])
-                run_result = model.fit(x_fit, y, validation_split=validation_split, validation_data=val_data_fit,
-                                       epochs=epochs, batch_size=batch_size,
-                                       verbose=debug, validation_freq=display_freq)
-                test_results = self._inner_callback(model, validation_data, confusion_matrix, polar, i, it, run_result,
+                if model.optimizer.iterations > 0:
+                    # Start from a fresh optimizer state (ex: Adam moments), the slots are created again lazily
+                    model.optimizer = type(model.optimizer).from_config(model.optimizer.get_config())
+                    model.train_function = None     # Traced with the previous optimizer: rebuilt by fit
+                # batch_size is no longer given to fit (train_dataset is already batched) so it is set for validation
+                run_result = model.fit(train_dataset, validation_data=fit_validation_data, epochs=epochs,
+                                       verbose=debug, validation_freq=display_freq, validation_batch_size=batch_size)
+                test_results = self._inner_callback(model, val_data_fit, confusion_matrix, i, it, run_result,
                                                     test_results, test_data_fit)
-            self._outer_callback(pbar)
+            self._outer_callback(pbar, it)
         return self._end_callback(x, y, iterations, data_summary, polar, epochs, batch_size,
                                   confusion_matrix, test_results, pbar)
 
+    @staticmethod
+    def _get_train_dataset(x, y, validation_data, validation_split: float, batch_size: int):
+        """
+        Creates the tf.data pipeline used to train a model.
+        As keras does not support validation_split for datasets, the split is done here the same way keras does it
+            (the last samples are used for validation). It is ignored if validation_data is given.
+        :return: Tuple (train_dataset, validation_data) to be used by model.fit
+        """
+        if validation_data is None and validation_split:
+            split_at = int(y.shape[0] * (1. - validation_split))
+            validation_data = (x[split_at:], y[split_at:])
+            x, y = x[:split_at], y[:split_at]
+        train_dataset = data.Dataset.from_tensor_slices((x, y)).shuffle(buffer_size=y.shape[0])
+        train_dataset = train_dataset.batch(batch_size).prefetch(data.experimental.AUTOTUNE)
+        return train_dataset, validation_data
+
     @staticmethod
     def _get_fit_dataset(is_complex: bool, x, validation_data, test_data, polar):
         val_data_fit = None
@@ -158,6 +204,7 @@ class MonteCarlo:
         pbar = None
         # Reset data frame
         self.pandas_full_data = pd.DataFrame()
+        self._frames = []
         if not self.output_config['debug']:
             pbar = tqdm(total=iterations)
         if self.output_config['confusion_matrix']:
@@ -176,7 +223,8 @@ class MonteCarlo:
                       confusion_matrix, test_results, pbar):
         if not self.output_config['debug']:
             pbar.close()
-        self.pandas_full_data = self.pandas_full_data.reset_index(drop=True)
+        if self._frames:
+            self.pandas_full_data = pd.concat(self._frames, ignore_index=True, sort=False)
         self.monte_carlo_analyzer.set_df(self.pandas_full_data)
         if self.output_config['excel_summary']:
             try:  # TODO: Think this better
@@ -206,20 +254,23 @@ class MonteCarlo:
         if self.output_config['plot_all']:
             return self.monte_carlo_analyzer.do_all()
 
-    def _inner_callback(self, model, validation_data, confusion_matrix, polar, model_index, it,
+    def _inner_callback(self, model, val_data_fit, confusion_matrix, model_index, it,
                         run_result, test_results, test_data_fit):
         # TODO: Must have save_csv_history to do the montecarlo results latter
         # Save all results
         temp_path = self.monte_carlo_analyzer.path / f"run/iteration{it}_model{model_index}_{model.name}"
         os.makedirs(temp_path, exist_ok=True)
-        plotter = Plotter(path=temp_path, data_results_dict=run_result.history, model_name=model.name)
-        self.pandas_full_data = pd.concat([self.pandas_full_data, plotter.get_full_pandas_dataframe()], sort=False)
+        # Same data frame as Plotter.get_full_pandas_dataframe() but built from memory instead of reading the csv back
+        history = pd.DataFrame.from_dict(run_result.history)
+        history.to_csv(temp_path / f"{model.name}_results_fit.csv", index=False)
+        self._frames.append(pd.concat([pd.DataFrame({
+            'network': [model.name] * len(history),
+            'epoch': list(range(1, len(history) + 1)),
+            'path': [temp_path] * len(history)
+        }), history], axis=1, sort=False))
         if self.output_config['confusion_matrix']:
-            if validation_data is not None:  # TODO: Haven't yet done all cases here!
-                if model.inputs[0].dtype.is_complex:
-                    x_test, y_test = validation_data
-                else:
-                    x_test, y_test = (transform_to_real(validation_data[0], polar=polar), validation_data[1])
+            if val_data_fit is not None:  # TODO: Haven't yet done all cases here!
+                x_test, y_test = val_data_fit
                 try:
                     confusion_matrix[model_index]["matrix"] = pd.concat((confusion_matrix[model_index]["matrix"],
                                                                          get_confusion_matrix(model.predict(x_test),
@@ -234,12 +285,15 @@ class MonteCarlo:
             test_results = test_results.append(pd.DataFrame([tmp_result], columns=cols), ignore_index=True)
         return test_results
 
-    def _outer_callback(self, pbar):
+    def _outer_callback(self, pbar, it):
         if not self.output_config['debug']:
             pbar.update()
         if self.output_config['safety_checkpoints']:
-            # Save checkpoint in case Monte Carlo stops in the middle
-            self.pandas_full_data.to_csv(self.monte_carlo_analyzer.path / "run_data.csv", index=False)
+            # Save checkpoint in case Monte Carlo stops in the middle. Only the rows of this iteration are appended,
+            #   the file is overwritten with the full data frame by _end_callback.
+            pd.concat(self._frames[-len(self.models):], sort=False).to_csv(
+                self.monte_carlo_analyzer.path / "run_data.csv", mode='w' if it == 0 else 'a', header=it == 0,
+                index=False)
 
     # Saver functions
     def _save_montecarlo_log(self, iterations, dataset_name,  num_classes, polar_mode, dataset_size,
@@ -437,6 +491,12 @@ def run_montecarlo(models: List[Model], dataset: cvnn.dataset.Dataset, open_data
     return str(monte_carlo.monte_carlo_analyzer.path / "run_data.csv")
 
 
+@lru_cache(maxsize=4)
+def _get_gaussian_dataset(m: int, n: int, param_list: Tuple[Tuple[float, ...], ...]) -> cvnn.dataset.Dataset:
+    # param_list must be hashable for the cache, hence the tuple of tuples
+    return dp.CorrelatedGaussianCoeffCorrel(m, n, [list(param) for param in param_list], debug=False)
+
+
 def run_gaussian_dataset_montecarlo(iterations: int = 1000, m: int = 10000, n: int = 128, param_list=None,
                                     epochs: int = 150, batch_size: int = 100, display_freq: int = 1,
                                     optimizer='sgd',       # TODO: Add typing here
@@ -464,6 +524,8 @@ def run_gaussian_dataset_montecarlo(iterations: int = 1000, m: int = 10000, n: i
                 [-0.5, 1, 1]
             ]
         Default: None will default to the example.
+        The dataset is generated once for each (m, n, param_list) so that consecutive calls (for example sweeping
+            other parameters) are done on the same data.
     :param epochs: Number of epochs for each iteration
     :param batch_size: Batch size at each iteration
     :param display_freq: Frequency in terms of epochs of when to do a checkpoint.
@@ -487,7 +549,7 @@ def run_gaussian_dataset_montecarlo(iterations: int = 1000, m: int = 10000, n: i
             [0.5, 1, 1],
             [-0.5, 1, 1]
         ]
-    dataset = dp.CorrelatedGaussianCoeffCorrel(m, n, param_list, debug=False)
+    dataset = _get_gaussian_dataset(m, n, tuple(map(tuple, param_list)))
     print("Database loaded...")
     if models is not None:
         return run_montecarlo(models=models, dataset=dataset, open_dataset=None,
@@ -699,5 +761,12 @@ def _save_montecarlo_log(iterations, path, dataset_name, models_names, num_class
 
 
 if __name__ == "__main__":
-    # Base case with one hidden layer size 64 and dropout 0.5
-    run_gaussian_dataset_montecarlo(iterations=10, dropout=0.5)
+    parser = argparse.ArgumentParser(description="CVNN vs RVNN Monte Carlo over the correlated gaussian dataset")
+    parser.add_argument('--full', action='store_true',
+                        help="run the base case (10 iterations of 150 epochs) instead of a short smoke test")
+    args = parser.parse_args()
+    if args.full:
+        # Base case with one hidden layer size 64 and dropout 0.5
+        run_gaussian_dataset_montecarlo(iterations=10, dropout=0.5)
+    else:
+        run_gaussian_dataset_montecarlo(iterations=1, epochs=2, dropout=0.5, do_all=False)
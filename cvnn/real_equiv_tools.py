@@ -45,6 +45,28 @@ def _get_real_equivalent_multiplier(layers_shape, classifier, capacity_equivalen
     return output_multiplier
 
 
+# Real equivalent constructor of each layer type. Receives the layer and the iterator over output_multiplier.
+# Other layers can be supported by registering their class here.
+_TO_REAL = {
+    layers.ComplexDense: lambda layer, multipliers: layer.get_real_equivalent(output_multiplier=next(multipliers)),
+    ComplexLayer: lambda layer, multipliers: layer.get_real_equivalent()
+}
+
+
+def _get_real_equivalent_layer(layer, multipliers):
+    """
+    Returns the real equivalent of a single complex layer.
+    :param layer: ComplexLayer to be converted
+    :param multipliers: iterator over output_multiplier. Only consumed if layer is a ComplexDense
+    """
+    to_real = _TO_REAL.get(type(layer))
+    if to_real is None:     # Subclasses of a registered layer
+        to_real = next((_TO_REAL[cls] for cls in type(layer).__mro__ if cls in _TO_REAL), None)
+    if to_real is None:
+        raise TypeError(f"Unsupported layer {type(layer).__name__}, only cvnn complex layers can be converted")
+    return to_real(layer, multipliers)
+
+
 def get_real_equivalent(complex_model: Type[Sequential], classifier: bool = True, capacity_equivalent: bool = True,
                         equiv_technique: str = 'ratio', name: Optional[str] = None):
     assert isinstance(complex_model, Sequential), "Sorry, only sequential models supported for the moment"
@@ -59,18 +81,9 @@ def get_real_equivalent(complex_model: Type[Sequential], classifier: bool = True
                                       dtype=complex_model.layers[0].input.dtype.real_dtype)]
     output_multiplier = _get_real_equivalent_multiplier(complex_model.layers,
                                                         classifier, capacity_equivalent, equiv_technique)
-    counter = 0
-    for layer in complex_model.layers:
-        if isinstance(layer, ComplexLayer):
-            if isinstance(layer, layers.ComplexDense):  # TODO: Check if I can do this with kargs or sth
-                real_shape.append(layer.get_real_equivalent(
-                    output_multiplier=output_multiplier[counter]))
-                counter += 1
-            else:
-                real_shape.append(layer.get_real_equivalent())
-        else:
-            sys.exit("Layer " + str(layer) + " unknown")
-    assert counter == len(output_multiplier)
+    multipliers = iter(output_multiplier)       # Consumed by the dense layers only, in order
+    real_shape += [_get_real_equivalent_layer(layer, multipliers) for layer in complex_model.layers]
+    assert next(multipliers, None) is None
     if name is None:
         name = f"{complex_model.name}_real_equiv"
     real_equiv = Sequential(real_shape, name=name)
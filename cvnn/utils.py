@@ -110,12 +110,13 @@ def transform_to_real(x_complex, polar=False):
     m = np.shape(x_complex)[0]
     n = np.prod(np.shape(x_complex)[1:])
     flat_x_complex = np.reshape(x_complex, (m, n))
-    x_real = np.ones((m, 2*n))
+    # Keep the input precision (complex64 -> float32) so that the real model receives its own dtype
+    x_real = np.empty((m, 2*n), dtype=tf.dtypes.as_dtype(x_complex.dtype).real_dtype.as_numpy_dtype)
     if not polar:
-        x_real[:, :n] = np.real(flat_x_complex)
-        x_real[:, n:] = np.imag(flat_x_complex)
+        x_real[:, :n] = flat_x_complex.real     # .real and .imag are views, no temporary copy is made
+        x_real[:, n:] = flat_x_complex.imag
     else:
-        x_real[:, :n] = np.abs(flat_x_complex)
+        np.abs(flat_x_complex, out=x_real[:, :n])
         x_real[:, n:] = np.angle(flat_x_complex)
     return np.reshape(x_real, np.shape(x_complex)[:-1] + (np.shape(x_complex)[-1]*2,))
 
@@ -10,6 +10,10 @@ ENABLE_MEMORY_GROWTH = True     # https://stackoverflow.com/questions/36927607/h
 DEBUG_CONV = False
 TEST_KERAS_CONV2D = False
 TEST_CONV_SPEED = False
+ENABLE_XLA = False              # Compiles the whole training step into fused kernels (no tf.print allowed inside).
+                                # Not every device/TF build supports XLA (and it needs TF >= 2.5), so it is opt-in
+# jit_compile is only given when XLA is enabled so the script still runs on TF < 2.5
+train_step_function = tf.function(jit_compile=True) if ENABLE_XLA else tf.function
 
 if ENABLE_MEMORY_GROWTH:
     gpus = tf.config.experimental.list_physical_devices('GPU')
@@ -233,54 +237,104 @@ if DEBUG_CONV:
 class Model:
     def __init__(self, shape):
         self.shape = shape
+        # Collected once so the traced _train_step does not loop over the layers at every step
+        self._trainable_vars = tuple(v for lay in self.shape for v in lay.trainable_variables())
+        # Fixed tuple of bound methods: the traced forward pass does no list indexing over self.shape
+        self._layer_calls = tuple(lay.call for lay in self.shape)
+        # A Python float would be baked into the graph, a variable can be re-assigned without retracing
+        self.optimizer = tf.keras.optimizers.SGD(learning_rate=tf.Variable(0.01, dtype=tf.float32, trainable=False))
+        self.batch_size = 32    # Default for fit, can be changed with autotune_batch_size
         self.__class__.__call__ = self.call
         
     def call(self, x):
-        for i in range(len(self.shape)):  # Apply all the layers
-            x = self.shape[i].call(x)
+        for layer_call in self._layer_calls:  # Apply all the layers
+            x = layer_call(x)
         return x
         
-    def fit(self, x, y, epochs=10, batch_size=32, learning_rate=0.01):
-        train_dataset = tf.data.Dataset.from_tensor_slices((x, y)).batch(batch_size=batch_size)
-        num_tr_iter = int(x.shape[0] / batch_size)
+    def fit(self, x, y, epochs=10, batch_size=None, learning_rate=0.01):
+        if batch_size is None:
+            batch_size = self.batch_size
+        self.optimizer.learning_rate.assign(learning_rate)
+        self._check_gradients(x[:batch_size], y[:batch_size])
+        # Pipeline is built once: shuffling and batching overlap with the training step thanks to prefetch
+        train_dataset = tf.data.Dataset.from_tensor_slices((x, y))
+        train_dataset = train_dataset.shuffle(x.shape[0], reshuffle_each_iteration=True)
+        # drop_remainder keeps every batch the same shape so _train_step is traced only once
+        train_dataset = train_dataset.batch(batch_size=batch_size, drop_remainder=True)
+        train_dataset = train_dataset.prefetch(tf.data.experimental.AUTOTUNE)
+        num_tr_iter = x.shape[0] // batch_size
         for epoch in range(epochs):
             iteration = 0
             tf.print("\nEpoch {0}/{1}".format(epoch+1, epochs))
             progbar = tf.keras.utils.Progbar(num_tr_iter)
-            for x_batch, y_batch in train_dataset.prefetch(tf.data.experimental.AUTOTUNE).cache():
-                progbar.update(iteration)
+            for x_batch, y_batch in train_dataset:
+                current_loss = self._train_step(x_batch, y_batch)
                 iteration += 1
-                self._train_step(x_batch, y_batch, learning_rate)
+                # Log the loss already computed by the training step instead of running a new forward pass
+                progbar.update(iteration, values=[("loss", current_loss)])
                 
+    def autotune_batch_size(self, x, y, candidates=(32, 64, 128, 256, 512, 1024), warmup_steps=5, timed_steps=20):
+        """
+        Times _train_step for each candidate batch size and keeps the largest one whose throughput (samples/s)
+        is within 10% of the best one. Candidates that do not fit in memory or are bigger than the dataset are skipped.
+        The chosen value is used as the default batch_size of fit. Weights are restored after the probing.
+        :param x: Training data
+        :param y: Training labels
+        :param candidates: Batch sizes to try
+        :param warmup_steps: Steps run before timing (they include the tracing of each new batch shape)
+        :param timed_steps: Steps used to measure the throughput
+        :return: The chosen batch size
+        """
+        saved_weights = [v.numpy() for v in self._trainable_vars]
+        throughput = {}
+        for batch_size in candidates:
+            if batch_size > x.shape[0]:
+                break
+            x_batch = tf.convert_to_tensor(x[:batch_size])
+            y_batch = tf.convert_to_tensor(y[:batch_size])
+            try:
+                for _ in range(warmup_steps):
+                    self._train_step(x_batch, y_batch).numpy()
+                start_time = perf_counter()
+                for _ in range(timed_steps):
+                    loss = self._train_step(x_batch, y_batch)
+                loss.numpy()        # Waits for the device to finish before stopping the clock
+                end_time = perf_counter()
+            except tf.errors.ResourceExhaustedError:
+                break
+            throughput[batch_size] = batch_size * timed_steps / (end_time - start_time)
+            print("Batch size {0}: {1:.1f} samples/s".format(batch_size, throughput[batch_size]))
+        for v, w in zip(self._trainable_vars, saved_weights):
+            v.assign(w)
+        if throughput:
+            best = max(throughput.values())
+            self.batch_size = max(bs for bs, t in throughput.items() if t >= 0.9 * best)
+        return self.batch_size
+
+    def _check_gradients(self, x_batch, y_batch):
+        # Done once eagerly instead of inside the traced _train_step
+        with tf.GradientTape() as tape:
+            current_loss = self._apply_loss(y_batch, self.call(x_batch))
+        gradients = tape.gradient(current_loss, self._trainable_vars)
+        assert all(g is not None for g in gradients)
+
     def _apply_loss(self, y_true, y_pred):
         return tf.reduce_mean(input_tensor=tf.keras.losses.categorical_crossentropy(y_true, y_pred))
     
-    @tf.function      # This makes all faster but harder to debug (set_trace is broken and print doesn't work)
-    def _train_step(self, x_train_batch, y_train_batch, learning_rate):
+    # This makes all faster but harder to debug (set_trace is broken and print doesn't work)
+    @train_step_function
+    def _train_step(self, x_train_batch, y_train_batch):
         with tf.GradientTape() as tape:
             with tf.name_scope("Forward_Phase") as scope:
-                tf.print("Forward mode")
                 x_called = self.call(x_train_batch)  # Forward mode computation
             # Loss function computation
             with tf.name_scope("Loss") as scope:
-                tf.print("Compute loss")
                 current_loss = self._apply_loss(y_train_batch, x_called)  # Compute loss
 
-        # Calculating gradient
-        with tf.name_scope("Gradient") as scope:
-            tf.print("Get trainable variables")
-            variables = []
-            for lay in self.shape:
-                variables.extend(lay.trainable_variables())  # TODO: Debug this for all layers.
-            tf.print("Compute gradients")
-            gradients = tape.gradient(current_loss, variables)  # Compute gradients
-            assert all(g is not None for g in gradients)
-
-        # Backpropagation
+        # Calculating gradient and backpropagation
         with tf.name_scope("Optimizer") as scope:
-            tf.print("Assign values")
-            for i, val in enumerate(variables):
-                val.assign(val - learning_rate * gradients[i])
+            self.optimizer.minimize(current_loss, var_list=self._trainable_vars, tape=tape)
+        return current_loss
 
 # Prepare Dataset
 (train_images, train_labels), (test_images, test_labels) = datasets.cifar10.load_data()
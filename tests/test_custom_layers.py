@@ -2,6 +2,8 @@ import numpy as np
 from cvnn.layers import ComplexDense, ComplexFlatten, ComplexInput, ComplexConv2D, ComplexMaxPooling2D, \
     ComplexAvgPooling2D
 import cvnn.layers as complex_layers
+from cvnn.initializers import ComplexGlorotUniform, Zeros
+from tensorflow.python.keras.utils.generic_utils import custom_object_scope
 from tensorflow.keras.models import Sequential
 import tensorflow as tf
 import tensorflow_datasets as tfds
@@ -12,6 +14,15 @@ from pdb import set_trace
 This module tests:
     Correct result of Complex AVG and MAX pooling layers.
     Init ComplexConv2D layer and verifies output dtype and shape.
+    Correct result of ComplexConv2D compared to the 4 real convolutions definition.
+    Same ComplexConv2D result (in the channels_first layout) with data_format='channels_first'.
+    Correct result of the 1x1 ComplexConv2D (with and without bias) compared to the 4 real convolutions definition.
+    ComplexConv2D with compute_dtype=tf.bfloat16 runs, keeps the layer dtype and is kept by get_config.
+    Correct result of the depthwise (groups == input channels) ComplexConv2D compared to an explicit complex reference.
+    Same ComplexConv2D result when compiled with XLA (use_xla=True).
+    Same ComplexConv2D result when done as image patches and a matrix multiplication on CPU (use_im2col_cpu=True).
+    Correct result of ComplexDense compared to the complex matrix multiplication.
+    ComplexDense with compute_dtype=tf.bfloat16 runs, keeps the layer dtype and is kept by get_config.
     Trains using:
         ComplexDense
         ComplexFlatten
@@ -54,6 +65,35 @@ def dense_example():
     res = model(img.astype(np.complex64))
 
 
+def complex_dense_result():
+    x = tf.complex(tf.random.normal((5, 7)), tf.random.normal((5, 7)))
+    dense = ComplexDense(units=3)
+    dense(x)   # Builds the weights
+    dense.b_r.assign(tf.random.normal(dense.b_r.shape))
+    dense.b_i.assign(tf.random.normal(dense.b_i.shape))
+    y = dense(x)
+    expected = tf.matmul(x, tf.complex(dense.w_r, dense.w_i)) + tf.complex(dense.b_r, dense.b_i)
+    assert y.dtype == tf.complex64
+    assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+
+
+def complex_dense_bfloat16():
+    x = tf.complex(tf.random.normal((5, 7)), tf.random.normal((5, 7)))
+    dense = ComplexDense(units=3)
+    bf16_dense = ComplexDense(units=3, compute_dtype=tf.bfloat16)
+    y = dense(x)
+    bf16_dense(x)   # Builds the weights
+    bf16_dense.set_weights(dense.get_weights())
+    bf16_y = bf16_dense(x)
+    assert bf16_y.dtype == bf16_dense.my_dtype
+    assert np.allclose(bf16_y.numpy(), y.numpy(), atol=0.1)    # bfloat16 has only 8 bits of mantissa
+    config = bf16_dense.get_config()
+    assert config['compute_dtype'] == 'bfloat16'
+    with tf.keras.utils.custom_object_scope({'ComplexGlorotUniform': ComplexGlorotUniform, 'Zeros': Zeros}):
+        copied_dense = ComplexDense.from_config(config)
+    assert copied_dense.my_compute_dtype == tf.bfloat16 and copied_dense.my_dtype == bf16_dense.my_dtype
+
+
 def serial_layers():
     model = Sequential()
     model.add(ComplexDense(32, activation='relu', input_shape=(32, 32, 3)))
@@ -96,6 +136,152 @@ def shape_ad_dtype_of_conv2d():
     assert y.dtype == tf.complex64
 
 
+def complex_conv_2d_result():
+    input_shape = (2, 9, 8, 3)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    conv = ComplexConv2D(4, (3, 2), strides=2, padding="same", dtype=x.dtype)
+    y = conv(x)
+    tf_conv = lambda inputs, kernel: tf.nn.conv2d(inputs, kernel, strides=2, padding="SAME")
+    expected_r = tf_conv(tf.math.real(x), conv.kernel_r) - tf_conv(tf.math.imag(x), conv.kernel_i)
+    expected_i = tf_conv(tf.math.real(x), conv.kernel_i) + tf_conv(tf.math.imag(x), conv.kernel_r)
+    expected = tf.complex(expected_r, expected_i) + tf.complex(conv.bias_r, conv.bias_i)
+    assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+
+
+def complex_conv_2d_channels_first():
+    input_shape = (2, 3, 9, 8)     # (batch, channels, rows, cols)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    conv = ComplexConv2D(4, (3, 2), strides=2, padding="same", data_format="channels_first", dtype=x.dtype)
+    y = conv(x)
+    assert y.shape == (2, 4, 5, 4)
+    channels_last_conv = ComplexConv2D(4, (3, 2), strides=2, padding="same", dtype=x.dtype)
+    channels_last_conv.build((2, 9, 8, 3))
+    channels_last_conv.set_weights(conv.get_weights())
+    expected = tf.transpose(channels_last_conv(tf.transpose(x, (0, 2, 3, 1))), (0, 3, 1, 2))
+    assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+
+
+def complex_pointwise_conv_2d_result():
+    input_shape = (2, 9, 8, 3)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    tf_conv = lambda inputs, kernel: tf.nn.conv2d(inputs, kernel, strides=1, padding="VALID")
+    for use_bias in (True, False):
+        conv = ComplexConv2D(4, 1, use_bias=use_bias, dtype=x.dtype)
+        conv.build(x.shape)
+        if use_bias:
+            conv.bias_ri.assign(tf.random.normal(conv.bias_ri.shape))
+        y = conv(x)
+        expected_r = tf_conv(tf.math.real(x), conv.kernel_r) - tf_conv(tf.math.imag(x), conv.kernel_i)
+        expected_i = tf_conv(tf.math.real(x), conv.kernel_i) + tf_conv(tf.math.imag(x), conv.kernel_r)
+        expected = tf.complex(expected_r, expected_i)
+        if use_bias:
+            expected += tf.complex(conv.bias_r, conv.bias_i)
+        assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+
+
+def complex_conv_2d_bfloat16():
+    input_shape = (2, 9, 8, 3)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    conv = ComplexConv2D(4, 3, padding="same", dtype=x.dtype)
+    bf16_conv = ComplexConv2D(4, 3, padding="same", dtype=x.dtype, compute_dtype=tf.bfloat16)
+    y = conv(x)
+    bf16_conv.build(x.shape)
+    bf16_conv.set_weights(conv.get_weights())
+    bf16_y = bf16_conv(x)
+    assert bf16_y.dtype == bf16_conv.my_dtype
+    assert np.allclose(bf16_y.numpy(), y.numpy(), atol=0.1)    # bfloat16 has only 8 bits of mantissa
+    config = bf16_conv.get_config()
+    assert config['compute_dtype'] == 'bfloat16'
+    # The conv layers use the tensorflow.python.keras registries
+    with custom_object_scope({'ComplexGlorotUniform': ComplexGlorotUniform, 'Zeros': Zeros}):
+        copied_conv = ComplexConv2D.from_config(config)
+    assert copied_conv.my_compute_dtype == tf.bfloat16 and copied_conv.my_dtype == bf16_conv.my_dtype
+
+
+def complex_conv_2d_reference(x, kernel, bias, strides, dilation_rate, groups):
+    """Explicit complex cross-correlation ('valid' padding) computed one output pixel at a time."""
+    kh, kw, group_channels, filters = kernel.shape
+    group_filters = filters // groups
+    out_h = (x.shape[1] - (kh - 1) * dilation_rate - 1) // strides + 1
+    out_w = (x.shape[2] - (kw - 1) * dilation_rate - 1) // strides + 1
+    out = np.zeros((x.shape[0], out_h, out_w, filters), dtype=np.complex64)
+    for i in range(out_h):
+        for j in range(out_w):
+            patch = x[:, i * strides:i * strides + (kh - 1) * dilation_rate + 1:dilation_rate,
+                      j * strides:j * strides + (kw - 1) * dilation_rate + 1:dilation_rate, :]
+            for f in range(filters):
+                g = f // group_filters
+                out[:, i, j, f] = np.sum(patch[..., g * group_channels:(g + 1) * group_channels] * kernel[..., f],
+                                         axis=(1, 2, 3))
+    return out + bias
+
+
+def complex_depthwise_conv_2d_result():
+    input_shape = (2, 11, 10, 3)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    for strides, dilation_rate in ((1, 1), (2, 1), (1, 2)):
+        conv = ComplexConv2D(6, 3, strides=strides, dilation_rate=dilation_rate, groups=3, dtype=x.dtype)
+        conv.build(x.shape)
+        conv.bias_ri.assign(tf.random.normal(conv.bias_ri.shape))
+        y = conv(x)
+        expected = complex_conv_2d_reference(x.numpy(), conv.kernel_r.numpy() + 1j * conv.kernel_i.numpy(),
+                                             conv.bias_r.numpy() + 1j * conv.bias_i.numpy(),
+                                             strides, dilation_rate, groups=3)
+        assert np.allclose(y.numpy(), expected, atol=1e-5)
+    # Strides and dilation together are not supported (as for the other convolutions)
+    try:
+        ComplexConv2D(6, 3, strides=2, dilation_rate=2, groups=3, dtype=x.dtype)(x)
+        assert False, "strides > 1 with dilation_rate > 1 should raise"
+    except ValueError:
+        pass
+    # Extra leading batch dimensions (same result as each (2, 11, 10, 3) slice through the depthwise path)
+    x = tf.complex(tf.random.normal((2, 3) + input_shape[1:]), tf.random.normal((2, 3) + input_shape[1:]))
+    conv = ComplexConv2D(6, 3, groups=3, dtype=x.dtype)
+    y = conv(x)
+    assert y.shape == (2, 3, 9, 8, 6)
+    depthwise_conv = ComplexConv2D(6, 3, groups=3, dtype=x.dtype)
+    depthwise_conv.build(x.shape[1:])
+    depthwise_conv.set_weights(conv.get_weights())
+    expected = tf.stack([depthwise_conv(x[:, i]) for i in range(x.shape[1])], axis=1)
+    assert np.allclose(y.numpy(), expected.numpy(), atol=1e-5)
+
+
+def complex_conv_2d_xla():
+    input_shape = (2, 9, 8, 4)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    for groups in (1, 2):     # groups > 1 uses the 3 convolutions (Gauss) product
+        conv = ComplexConv2D(4, 3, padding="same", groups=groups, dtype=x.dtype)
+        xla_conv = ComplexConv2D(4, 3, padding="same", groups=groups, dtype=x.dtype, use_xla=True)
+        y = conv(x)
+        xla_conv.build(x.shape)
+        xla_conv.set_weights(conv.get_weights())
+        assert np.allclose(xla_conv(x).numpy(), y.numpy(), atol=1e-5)
+
+
+def complex_conv_2d_im2col():
+    if tf.config.list_logical_devices('GPU'):
+        return      # im2col is only used on CPU
+    input_shape = (2, 9, 8, 3)
+    x = tf.complex(tf.random.normal(input_shape), tf.random.normal(input_shape))
+    for padding in ("same", "valid"):
+        for strides in (1, 2, (2, 3)):
+            conv = ComplexConv2D(4, (3, 2), strides=strides, padding=padding, dtype=x.dtype)
+            im2col_conv = ComplexConv2D(4, (3, 2), strides=strides, padding=padding, dtype=x.dtype,
+                                        use_im2col_cpu=True)
+            y = conv(x)
+            im2col_conv.build(x.shape)
+            im2col_conv.set_weights(conv.get_weights())
+            assert np.allclose(im2col_conv(x).numpy(), y.numpy(), atol=1e-5)
+    # Extra leading batch dimensions fall back to the default convolution
+    x = tf.complex(tf.random.normal((2, 3) + input_shape[1:]), tf.random.normal((2, 3) + input_shape[1:]))
+    conv = ComplexConv2D(4, (3, 2), strides=2, padding="same", dtype=x.dtype)
+    im2col_conv = ComplexConv2D(4, (3, 2), strides=2, padding="same", dtype=x.dtype, use_im2col_cpu=True)
+    y = conv(x)
+    im2col_conv.build(x.shape)
+    im2col_conv.set_weights(conv.get_weights())
+    assert np.allclose(im2col_conv(x).numpy(), y.numpy(), atol=1e-5)
+
+
 def normalize_img(image, label):
     """Normalizes images: `uint8` -> `float32`."""
     return tf.cast(image, tf.float32) / 255., label
@@ -219,7 +405,16 @@ def test_layers():
     dropout()
     complex_avg_pool()
     shape_ad_dtype_of_conv2d()
+    complex_conv_2d_result()
+    complex_conv_2d_channels_first()
+    complex_pointwise_conv_2d_result()
+    complex_conv_2d_bfloat16()
+    complex_depthwise_conv_2d_result()
+    complex_conv_2d_xla()
+    complex_conv_2d_im2col()
     dense_example()
+    complex_dense_result()
+    complex_dense_bfloat16()
 
 
 if __name__ == "__main__":
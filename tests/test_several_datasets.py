@@ -59,8 +59,6 @@ def fashion_mnist_example():
     (train_images, train_labels), (test_images, test_labels) = fashion_mnist.load_data()
     train_images = train_images.astype(dtype_1)
     test_images = test_images.astype(dtype_1)
-    train_labels = train_labels.astype(dtype_1)
-    test_labels = test_labels.astype(dtype_1)
 
     model = tf.keras.Sequential([
         ComplexInput(input_shape=(28, 28)),
@@ -80,23 +78,20 @@ def fashion_mnist_example():
 def cifar10_test():
     dtype_1 = 'complex64'
     (train_images, train_labels), (test_images, test_labels) = datasets.cifar10.load_data()
-    # Normalize pixel values to be between 0 and 1
-    train_images, test_images = train_images / 255.0, test_images / 255.0
-    train_images = train_images.astype(dtype_1)
-    test_images = test_images.astype(dtype_1)
-    train_labels = train_labels.astype(dtype_1)
-    test_labels = test_labels.astype(dtype_1)
+    # Normalize pixel values to be between 0 and 1 (in float32, without the float64 copy of a numpy division)
+    train_images = tf.cast(tf.cast(train_images, tf.float32) / 255., dtype_1)
+    test_images = tf.cast(tf.cast(test_images, tf.float32) / 255., dtype_1)
 
     tf.random.set_seed(1)
-    hist1 = cifar10_test_model_1(train_images, train_labels, test_images, test_labels, dtype_1)
-
-    tf.random.set_seed(1)
-    hist2 = cifar10_test_model_2(train_images, train_labels, test_images, test_labels, dtype_1)
-
-    assert hist1.history == hist2.history
+    model_1 = cifar10_test_model_1(dtype_1)
+    model_1.fit(train_images, train_labels, epochs=2, validation_data=(test_images, test_labels), shuffle=False)
+    # Same network using the functional API. With the same weights both must give the same output.
+    model_2 = cifar10_test_model_2(dtype_1)
+    model_2.set_weights(model_1.get_weights())
+    tf.debugging.assert_near(model_1(test_images[:128], training=False), model_2(test_images[:128], training=False))
 
 
-def cifar10_test_model_1(train_images, train_labels, test_images, test_labels, dtype_1='complex64'):
+def cifar10_test_model_1(dtype_1='complex64'):
     model = models.Sequential()
     model.add(layers.ComplexInput(input_shape=(32, 32, 3), dtype=dtype_1))  # Never forget this!!!
     model.add(layers.ComplexConv2D(32, (3, 3), activation='cart_relu'))
@@ -111,10 +106,10 @@ def cifar10_test_model_1(train_images, train_labels, test_images, test_labels, d
     model.compile(optimizer='adam',
                   loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
                   metrics=['accuracy'])
-    return model.fit(train_images, train_labels, epochs=2, validation_data=(test_images, test_labels), shuffle=False)
+    return model
 
 
-def cifar10_test_model_2(train_images, train_labels, test_images, test_labels, dtype_1='complex64'):
+def cifar10_test_model_2(dtype_1='complex64'):
     x = layers.complex_input(shape=(32, 32, 3), dtype=dtype_1)
     conv1 = layers.ComplexConv2D(32, (3, 3), activation='cart_relu')(x)
     pool1 = layers.ComplexMaxPooling2D((2, 2))(conv1)
@@ -130,12 +125,13 @@ def cifar10_test_model_2(train_images, train_labels, test_images, test_labels, d
                   loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
                   metrics=['accuracy'])
     model.summary()
-    return model.fit(train_images, train_labels, epochs=2, validation_data=(test_images, test_labels), shuffle=False)
+    return model
 
 
 def random_dataset():
-    x_train = np.complex64(tf.complex(tf.random.uniform([640, 65, 82, 1]), tf.random.uniform([640, 65, 82, 1])))
-    x_test = np.complex64(tf.complex(tf.random.uniform([200, 65, 82, 1]), tf.random.uniform([200, 65, 82, 1])))
+    # Real and imaginary parts are drawn together on the last axis and reinterpreted as complex64
+    x_train = tf.bitcast(tf.random.stateless_uniform([640, 65, 82, 1, 2], seed=(1, 2)), tf.complex64).numpy()
+    x_test = tf.bitcast(tf.random.stateless_uniform([200, 65, 82, 1, 2], seed=(3, 4)), tf.complex64).numpy()
     y_train = np.uint8(np.random.randint(5, size=(640, 1)))
     y_test = np.uint8(np.random.randint(5, size=(200, 1)))
 